@@ -0,0 +1,97 @@
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+class RateLimiter:
+    """Sliding-window limiter allowing at most `limit` calls per `window` seconds."""
+
+    def __init__(self, limit, window=60.0):
+        self.limit = limit
+        self.window = window
+        self.calls = deque()
+        self.lock = threading.Lock()
+        self.resume_at = 0.0
+
+    def pause(self, seconds):
+        """Hold back every caller for `seconds`, e.g. when the API answers with Retry-After."""
+        with self.lock:
+            self.resume_at = max(self.resume_at, time.monotonic() + seconds)
+
+    async def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                while self.calls and now - self.calls[0] >= self.window:
+                    self.calls.popleft()
+                if now < self.resume_at:
+                    wait = self.resume_at - now
+                elif len(self.calls) < self.limit:
+                    self.calls.append(now)
+                    return
+                else:
+                    wait = self.window - (now - self.calls[0])
+            await asyncio.sleep(wait)
+
+def retry_after(exc, max_wait):
+    """Seconds the server asked us to wait (Retry-After header), at most max_wait, or None."""
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), max_wait)
+
+def split_text(text, size, overlap):
+    """Split text into windows of `size` characters, each overlapping the previous one by
+    `overlap`, so claims on a boundary appear whole in one of them."""
+    step = size - overlap
+    return [text[i:i + size] for i in range(0, max(len(text) - overlap, 1), step)]
+
+async def open_stream(start, **kwargs):
+    """Start a streamed call with start(**kwargs) and wait for its first chunk.
+
+    The Gemini SDK sends no request until its generator is first read, so this is the
+    call that has to be retried for 429s, 5xx and dropped connections to be caught.
+    Returns a stream that yields that first chunk again, then the rest.
+    """
+    stream = await start(**kwargs)
+    try:
+        first = await stream.__anext__()
+    except StopAsyncIteration:
+        first = None
+
+    async def replay():
+        if first is None:
+            return
+        yield first
+        async for chunk in stream:
+            yield chunk
+
+    return replay()
+
+async def iter_streamed_array(stream):
+    """Yield each element of a streamed JSON array as soon as its closing bracket arrives."""
+    decoder = json.JSONDecoder()
+    buffer, pos = "", 0
+    async for chunk in stream:
+        buffer += chunk.text or ""
+        while True:
+            while pos < len(buffer) and buffer[pos] in "[, \t\r\n":
+                pos += 1
+            if pos == len(buffer) or buffer[pos] == "]":
+                break
+            try:
+                item, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                break  # element still incomplete; wait for more text
+            yield item
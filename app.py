@@ -1,16 +1,117 @@
 import streamlit as st
 from google import genai
-from tavily import TavilyClient
-import PyPDF2
-import json
+from google.genai import types
+from api_utils import RateLimiter, iter_streamed_array, open_stream, retry_after, split_text
+from claim_utils import WHITESPACE, answer_verdict, claim_identity, dedupe_claims, query_key
+from pdf_utils import extract_text, make_executor
+import asyncio
+import diskcache
+import hashlib
+import httpx
+import orjson
 import os
-from datetime import datetime
+import queue
+import random
+import tempfile
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, datetime
+from typing import Literal
+from pydantic import BaseModel, Field, ValidationError
 
 # ---------------- CONFIG ----------------
 st.set_page_config(page_title="Fact Checker", page_icon="🔍", layout="wide")
 
 MODEL_NAME = "models/gemini-2.5-flash"
 
+def get_setting(name, default):
+    """Read a tunable from the environment or st.secrets, falling back to default."""
+    value = os.getenv(name)
+    if value is None:
+        try:
+            value = st.secrets.get(name, default)
+        except FileNotFoundError:
+            value = default
+    return type(default)(value)
+
+# Max in-flight requests per provider while verifying claims
+TAVILY_CONCURRENCY = get_setting("TAVILY_CONCURRENCY", 5)
+GEMINI_CONCURRENCY = get_setting("GEMINI_CONCURRENCY", 5)
+
+# Requests per minute allowed by each provider's API tier
+TAVILY_RPM = get_setting("TAVILY_RPM", 100)
+GEMINI_RPM = get_setting("GEMINI_RPM", 60)
+
+# Retries for rate-limited / transient failures, with exponential backoff
+MAX_RETRIES = get_setting("MAX_RETRIES", 3)
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 16.0
+# Longest Retry-After from a 429/503 that is honored before giving up on the wait
+RETRY_AFTER_MAX = 60.0
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# Timeouts, dropped connections and HTTP/2 streams reset by the server (GOAWAY)
+RETRYABLE_ERRORS = (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError)
+
+# Each provider gets one HTTP/2 keep-alive pool shared by every call in the process
+TAVILY_API_URL = "https://api.tavily.com"
+TAVILY_TIMEOUT = 60.0
+HTTP_LIMITS = httpx.Limits(max_connections=40, max_keepalive_connections=20)
+
+# Text beyond this many characters is not read from the PDF at all
+MAX_DOCUMENT_CHARS = get_setting("MAX_DOCUMENT_CHARS", 200000)
+
+# Long documents are split into overlapping windows for claim extraction
+EXTRACT_CHUNK_CHARS = 8000
+EXTRACT_CHUNK_OVERLAP = 1000
+
+# How long results are reused across reruns of the same document (seconds)
+EXTRACT_CACHE_TTL = 3600
+CLAIMS_CACHE_TTL = 7 * 86400
+VERIFY_CACHE_TTL = 86400
+SEARCH_CACHE_TTL = 21600
+
+# Recent Tavily results kept in memory, keyed by query fingerprint
+SEARCH_CACHE_SIZE = 256
+
+# Extracted claims, verdicts and search results are persisted on disk so they survive restarts and redeploys
+VERDICT_CACHE_DIR = get_setting("VERDICT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "factcheck_cache"))
+VERDICT_CACHE_SIZE = 2 ** 30
+
+# Web evidence passed to Gemini per claim: title, url and a short snippet of the top results
+SEARCH_MAX_RESULTS = 3
+SEARCH_DEPTH = "advanced"
+SNIPPET_MAX_CHARS = 300
+
+# Claims per Gemini verification call; with the trimmed evidence above a batch
+# of 8 stays well under ~6K input tokens (~4 chars per token), and 15-20 still
+# fits comfortably if fewer, larger calls suit the API tier better.
+VERIFY_BATCH_SIZE = get_setting("VERIFY_BATCH_SIZE", 8)
+
+# Output caps per Gemini call. Extraction is a plain transcription task and runs
+# without thinking; verification keeps a bounded thinking budget, and its cap
+# grows with the batch at roughly 300 output tokens per verdict. Thinking counts
+# against the cap too, so a reply cut off by it is retried in smaller batches.
+EXTRACT_MAX_OUTPUT_TOKENS = get_setting("EXTRACT_MAX_OUTPUT_TOKENS", 4096)
+VERIFY_THINKING_BUDGET = get_setting("VERIFY_THINKING_BUDGET", 1024)
+VERIFY_MAX_OUTPUT_TOKENS = VERIFY_THINKING_BUDGET + 300 * VERIFY_BATCH_SIZE
+
+# ---------------- PROMPTS ----------------
+# Fixed instructions are sent as the system instruction of a prebuilt config, so
+# every request starts with the same bytes and Gemini's implicit prefix caching
+# can reuse them; the contents carry only the document or claims.
+EXTRACT_INSTRUCTIONS = """Extract ALL verifiable factual claims from the document you are given."""
+
+VERIFY_INSTRUCTIONS = """Fact-check each of the claims you are given using its web data
+(each numbered source gives a page title, its url and a snippet).
+Return one verdict per claim, using the claim's number as its id."""
+
+VERIFY_CLAIM_SECTION = """=== CLAIM {id} ===
+CLAIM: "{claim}"
+WEB DATA:
+{context}"""
+
 # ---------------- INIT CLIENTS ----------------
 @st.cache_resource
 def init_clients():
@@ -21,91 +122,493 @@ def init_clients():
         st.error("⚠️ API keys not found. Please set GOOGLE_API_KEY and TAVILY_API_KEY.")
         st.stop()
 
-    client = genai.Client(api_key=gemini_key)
-    return client, TavilyClient(api_key=tavily_key)
+    # Pools are per provider rather than shared, so neither API key is ever sent to the other host
+    client = genai.Client(
+        api_key=gemini_key,
+        http_options=types.HttpOptions(async_client_args={"http2": True, "limits": HTTP_LIMITS})
+    )
+    tavily_http = httpx.AsyncClient(
+        base_url=TAVILY_API_URL,
+        headers={"Authorization": f"Bearer {tavily_key}"},
+        timeout=TAVILY_TIMEOUT,
+        http2=True,
+        limits=HTTP_LIMITS
+    )
+    return client, tavily_http
+
+genai_client, tavily_http = init_clients()
+
+async def tavily_search(**params):
+    response = await tavily_http.post("/search", json=params)
+    response.raise_for_status()
+    return response.json()
+
+# ---------------- ASYNC RUNTIME ----------------
+class AsyncRunner:
+    """Long-lived event loop on a daemon thread.
+
+    Pooled async HTTP connections belong to the loop that opened them, so every
+    coroutine using the shared clients runs here instead of under asyncio.run.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+
+    def run(self, make_coro, on_event=None):
+        """Run make_coro(emit) on the loop and return its result.
+
+        Calls to emit(*args) are delivered to on_event(*args) on the calling
+        thread, where Streamlit elements can be updated.
+        """
+        events = queue.SimpleQueue()
+        future = asyncio.run_coroutine_threadsafe(make_coro(lambda *args: events.put(args)), self.loop)
+        try:
+            while True:
+                try:
+                    args = events.get(timeout=0.05)
+                except queue.Empty:
+                    if future.done():
+                        break
+                    continue
+                if on_event:
+                    on_event(*args)
+            while not events.empty():
+                if on_event:
+                    on_event(*events.get_nowait())
+        except BaseException:
+            # Stop or a rerun raises on this thread mid-run; cancel the coroutine so it
+            # stops spending API quota and rate-limiter slots shared with other sessions
+            future.cancel()
+            raise
+        return future.result()
 
-genai_client, tavily_client = init_clients()
+@st.cache_resource
+def init_runner():
+    return AsyncRunner()
 
-# ---------------- HELPERS ----------------
-def extract_text_from_pdf(pdf_file):
-    reader = PyPDF2.PdfReader(pdf_file)
-    return "\n".join(page.extract_text() or "" for page in reader.pages)
-
-def clean_json_response(text):
-    text = text.strip()
-    if text.startswith("```"):
-        text = text.split("```")[1]
-        if text.lower().startswith("json"):
-            text = text[4:].strip()
-    return text
+runner = init_runner()
 
-# ---------------- CLAIM EXTRACTION ----------------
-def extract_claims(text):
-    prompt = f"""
-Extract ALL verifiable factual claims from this document.
-
-Return ONLY a JSON array:
-[
-  {{
-    "claim": "exact claim text",
-    "category": "financial/statistic/date/technical/economic",
-    "search_query": "optimized search query"
-  }}
-]
-
-Document:
-{text[:10000]}
-"""
+# ---------------- RATE LIMITING ----------------
+@st.cache_resource
+def init_rate_limiters():
+    # Shared by every session in this process, since the quotas are per API key
+    return RateLimiter(TAVILY_RPM), RateLimiter(GEMINI_RPM)
+
+tavily_limiter, gemini_limiter = init_rate_limiters()
+
+def is_retryable(exc):
+    if isinstance(exc, RETRYABLE_ERRORS):
+        return True
+    code = getattr(exc, "code", None)
+    if not isinstance(code, int):
+        code = getattr(getattr(exc, "response", None), "status_code", None)
+    return code in RETRYABLE_STATUS
+
+async def call_with_retries(limiter, fn, *args, **kwargs):
+    """Await an API call, respecting the rate limit and retrying transient errors."""
+    for attempt in range(MAX_RETRIES + 1):
+        await limiter.acquire()
+        try:
+            return await fn(*args, **kwargs)
+        except Exception as e:
+            if attempt == MAX_RETRIES or not is_retryable(e):
+                raise
+            # A server-given Retry-After holds back every call to that API, not just this one
+            wait = retry_after(e, RETRY_AFTER_MAX)
+            if wait is not None:
+                limiter.pause(wait)
+                continue
+            # Full jitter keeps parallel retries from hitting the API in lockstep
+            delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt)
+            await asyncio.sleep(random.uniform(0, delay))
 
+# ---------------- HELPERS ----------------
+@st.cache_resource
+def init_pdf_executor():
+    # One pool of PDF worker processes shared by all sessions, so page parsing never
+    # runs on a script thread and concurrent uploads are read in parallel
+    return make_executor()
+
+@st.cache_data(ttl=EXTRACT_CACHE_TTL, max_entries=32, show_spinner=False)
+def extract_text_from_pdf(_pdf_bytes, pdf_hash):
+    # Keyed on the content hash only; the underscore stops Streamlit re-hashing the bytes
     try:
-        response = genai_client.models.generate_content(
-            model=MODEL_NAME,
-            contents=prompt
+        return extract_text(_pdf_bytes, max_chars=MAX_DOCUMENT_CHARS, executor=init_pdf_executor())
+    except BrokenProcessPool:
+        # A crashed worker breaks the pool for good; the next run starts a fresh one
+        init_pdf_executor.clear()
+        raise
+
+def cache_key(data):
+    # blake2b is several times faster than sha256, and 128 bits is ample for cache keys
+    if isinstance(data, str):
+        data = data.encode()
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+@st.cache_resource
+def init_disk_cache():
+    # Shared so identical documents, claims and queries across sessions reuse results
+    return diskcache.Cache(VERDICT_CACHE_DIR, size_limit=VERDICT_CACHE_SIZE)
+
+disk_cache = init_disk_cache()
+
+# ---------------- SCHEMAS ----------------
+# Gemini decodes straight into these shapes, so responses need no cleanup before use
+class Claim(BaseModel):
+    claim: str = Field(description="exact claim text")
+    category: Literal["financial", "statistic", "date", "technical", "economic", "announcement"]
+    search_query: str = Field(description="optimized web search query")
+
+class Verdict(BaseModel):
+    id: int = Field(description="number of the claim being judged")
+    status: Literal["VERIFIED", "INACCURATE", "FALSE"]
+    correct_info: str = Field(description="correct information")
+    sources: list[str] = Field(description="urls supporting the verdict")
+    explanation: str = Field(description="brief explanation")
+
+CLAIMS_CONFIG = types.GenerateContentConfig(
+    system_instruction=EXTRACT_INSTRUCTIONS,
+    max_output_tokens=EXTRACT_MAX_OUTPUT_TOKENS,
+    thinking_config=types.ThinkingConfig(thinking_budget=0),
+    response_mime_type="application/json",
+    response_schema=list[Claim]
+)
+VERDICTS_CONFIG = types.GenerateContentConfig(
+    system_instruction=VERIFY_INSTRUCTIONS,
+    max_output_tokens=VERIFY_MAX_OUTPUT_TOKENS,
+    thinking_config=types.ThinkingConfig(thinking_budget=VERIFY_THINKING_BUDGET),
+    response_mime_type="application/json",
+    response_schema=list[Verdict]
+)
+
+def parsed_response(response):
+    if response.parsed is None:
+        raise ValueError("Model response did not match the expected schema")
+    return response.parsed
+
+# ---------------- CLAIM EXTRACTION ----------------
+class IncompleteExtraction(Exception):
+    """Some document windows failed; carries the claims from the ones that worked.
+
+    Raised rather than returned so that st.cache_data never keeps a partial result.
+    """
+
+    def __init__(self, claims, failed, total):
+        super().__init__(f"{len(failed)} of {total} document sections could not be processed")
+        self.claims = claims
+        self.failed = failed
+        self.total = total
+
+def truncated(response):
+    candidates = response.candidates or []
+    return bool(candidates) and candidates[0].finish_reason == types.FinishReason.MAX_TOKENS
+
+async def extract_claims_chunk(chunk, model_name, gemini_sem):
+    async with gemini_sem:
+        response = await call_with_retries(
+            gemini_limiter,
+            genai_client.aio.models.generate_content,
+            model=model_name,
+            contents=chunk,
+            config=CLAIMS_CONFIG
         )
-        result = clean_json_response(response.text)
-        parsed = json.loads(result)
-        return parsed if isinstance(parsed, list) else []
-    except Exception as e:
-        st.error(f"Claim extraction failed: {e}")
+    if truncated(response):
+        # Too many claims for one reply: extract each half of the window separately,
+        # overlapping so a claim on the split stays whole in one of them
+        if len(chunk) < 2 * EXTRACT_CHUNK_OVERLAP:
+            raise ValueError("Claims in this section exceed the output token limit")
+        mid, overlap = len(chunk) // 2, EXTRACT_CHUNK_OVERLAP // 2
+        halves = await asyncio.gather(*[
+            extract_claims_chunk(half, model_name, gemini_sem)
+            for half in (chunk[:mid + overlap], chunk[mid - overlap:])
+        ])
+        return [claim_obj for claims in halves for claim_obj in claims]
+    return [claim.model_dump() for claim in parsed_response(response)]
+
+@st.cache_data(ttl=EXTRACT_CACHE_TTL, max_entries=32, show_spinner=False)
+def extract_claims(text, model_name=MODEL_NAME):
+    """Extract claims from every window of the document in parallel and merge them.
+
+    model_name is part of the cache key, so switching models never serves stale claims.
+    Raises IncompleteExtraction if only some windows succeed, and the first error if none do.
+    """
+    if not text.strip():
         return []
 
-# ---------------- CLAIM VERIFICATION ----------------
-def verify_claim(claim_obj):
-    try:
-        search_results = tavily_client.search(
-            query=claim_obj["search_query"],
-            max_results=5,
-            search_depth="advanced",
-            include_answer=True
+    async def extract_all():
+        gemini_sem = asyncio.Semaphore(GEMINI_CONCURRENCY)
+        chunks = split_text(text, EXTRACT_CHUNK_CHARS, EXTRACT_CHUNK_OVERLAP)
+        return await asyncio.gather(
+            *[extract_claims_chunk(chunk, model_name, gemini_sem) for chunk in chunks],
+            return_exceptions=True
         )
 
-        prompt = f"""
-Fact-check the following claim using the web data.
+    # Errors propagate so that a failed extraction is not cached
+    chunk_claims = runner.run(lambda emit: extract_all())
+    failed = [i for i, claims in enumerate(chunk_claims, start=1) if isinstance(claims, Exception)]
+    if len(failed) == len(chunk_claims):
+        raise chunk_claims[0]
+    unique, _ = dedupe_claims([
+        claim_obj for claims in chunk_claims if not isinstance(claims, Exception) for claim_obj in claims
+    ])
+    if failed:
+        raise IncompleteExtraction(unique, failed, len(chunk_claims))
+    return unique
+
+def claims_key(pdf_hash, model_name):
+    # Claims depend only on the document, the model and how much of the text is read
+    return f"claims|{pdf_hash}|{model_name}|{MAX_DOCUMENT_CHARS}"
+
+def get_cached_claims(pdf_hash, model_name):
+    return disk_cache.get(claims_key(pdf_hash, model_name))
+
+def cache_claims(pdf_hash, model_name, claims):
+    if claims:
+        disk_cache.set(claims_key(pdf_hash, model_name), claims, expire=CLAIMS_CACHE_TTL)
 
-CLAIM: "{claim_obj['claim']}"
+# ---------------- CLAIM VERIFICATION ----------------
+def verdict_key(claim_obj):
+    # Only the same claim up to case and punctuation, searched with the same query,
+    # shares a verdict; the date makes time-sensitive facts get re-checked daily
+    raw = f"{claim_identity(claim_obj)}|{date.today().isoformat()}"
+    return cache_key(raw)
+
+def get_cached_verdict(claim_obj):
+    return disk_cache.get(verdict_key(claim_obj))
+
+def evidence_key(claim_obj, context):
+    # The same claim judged by the same model against the same evidence needs no
+    # second Gemini call, whichever day it comes up again
+    raw = f"{MODEL_NAME}|{claim_obj['claim']}|{context}"
+    return cache_key(raw)
+
+def cache_verdict(claim_obj, verdict, context=None):
+    if verdict.get("status") != "ERROR":
+        disk_cache.set(verdict_key(claim_obj), verdict, expire=VERIFY_CACHE_TTL)
+        if context is not None:
+            disk_cache.set(evidence_key(claim_obj, context), verdict, expire=VERIFY_CACHE_TTL)
+
+def error_verdict(exc):
+    return {"status": "ERROR", "explanation": str(exc)}
+
+def clean_snippet(text):
+    # Collapsing whitespace first means the snippet budget is spent on words
+    return WHITESPACE.sub(" ", text or "").strip()[:SNIPPET_MAX_CHARS]
+
+async def search_web(query, tavily_sem):
+    async with tavily_sem:
+        search_results = await call_with_retries(
+            tavily_limiter,
+            tavily_search,
+            query=query,
+            max_results=SEARCH_MAX_RESULTS,
+            search_depth=SEARCH_DEPTH,
+            include_answer=True,
+            include_raw_content=False,
+            include_images=False
+        )
+    # Only title/url/snippet are useful evidence; scores and other metadata just cost tokens
+    return {
+        "answer": search_results.get("answer") or "",
+        "results": [
+            {"t": r.get("title"), "u": r.get("url"), "s": clean_snippet(r.get("content"))}
+            for r in search_results.get("results", [])[:SEARCH_MAX_RESULTS]
+        ]
+    }
 
-WEB DATA:
-{json.dumps(search_results)[:6000]}
-
-Return ONLY JSON:
-{{
-  "status": "VERIFIED/INACCURATE/FALSE",
-  "correct_info": "correct information",
-  "sources": ["url1", "url2"],
-  "explanation": "brief explanation"
-}}
-"""
-
-        response = genai_client.models.generate_content(
+@st.cache_resource
+def init_search_cache():
+    # Only touched from the runner's event loop thread, so it needs no lock
+    return OrderedDict()
+
+search_cache = init_search_cache()
+
+def search_key(query):
+    # Queries that differ only in word order, case or filler words share one search;
+    # the search settings are part of the key so changing them never reuses old results
+    raw = f"{query_key(query)}|{SEARCH_DEPTH}|{SEARCH_MAX_RESULTS}"
+    return cache_key(raw)
+
+def remember_search(key, entry):
+    search_cache[key] = entry
+    search_cache.move_to_end(key)
+    while len(search_cache) > SEARCH_CACHE_SIZE:
+        search_cache.popitem(last=False)
+
+async def cached_search(query, tavily_sem, force_refresh=False):
+    """search_web behind an in-memory LRU and the disk cache, so repeats across runs,
+    sessions and restarts skip Tavily while the results are under SEARCH_CACHE_TTL old."""
+    key = search_key(query)
+    if not force_refresh:
+        entry = search_cache.get(key) or disk_cache.get(key)
+        if entry and time.time() - entry[0] < SEARCH_CACHE_TTL:
+            remember_search(key, entry)
+            return entry[1]
+    entry = (time.time(), await search_web(query, tavily_sem))
+    remember_search(key, entry)
+    disk_cache.set(key, entry, expire=SEARCH_CACHE_TTL)
+    return entry[1]
+
+def format_context(search):
+    # Plain text costs far fewer tokens than JSON keys, quotes and escapes
+    return "\n\n".join(
+        f"[{i}] {r['t'] or ''}\n{r['u'] or ''}\n{r['s']}" for i, r in enumerate(search["results"], start=1)
+    ) or "(no results)"
+
+async def verify_claims_batch(batch, contexts, gemini_sem, on_verdict):
+    """Verify several claims with a single streamed Gemini call.
+
+    Calls on_verdict(index, verdict) as each verdict finishes streaming, so results
+    show up before the whole batch is done; claims without a verdict are skipped.
+    Returns True if the reply was cut off by the output token cap.
+    """
+    prompt = "\n\n".join(
+        VERIFY_CLAIM_SECTION.format(id=i, claim=claim_obj["claim"], context=context)
+        for i, (claim_obj, context) in enumerate(zip(batch, contexts), start=1)
+    )
+    async with gemini_sem:
+        stream = await call_with_retries(
+            gemini_limiter,
+            open_stream,
+            genai_client.aio.models.generate_content_stream,
             model=MODEL_NAME,
-            contents=prompt
+            contents=prompt,
+            config=VERDICTS_CONFIG
         )
-        result = clean_json_response(response.text)
-        return json.loads(result)
-    except Exception as e:
-        return {"status": "ERROR", "explanation": str(e)}
+        # The finish reason arrives on the last chunk
+        last = None
+
+        async def chunks():
+            nonlocal last
+            async for chunk in stream:
+                last = chunk
+                yield chunk
+
+        seen = set()
+        async for item in iter_streamed_array(chunks()):
+            try:
+                verdict = Verdict.model_validate(item)
+            except ValidationError:
+                continue
+            if 1 <= verdict.id <= len(batch) and verdict.id not in seen:
+                seen.add(verdict.id)
+                on_verdict(verdict.id - 1, verdict.model_dump(exclude={"id"}))
+    return last is not None and truncated(last)
+
+async def verify_claims(claims, on_result, force_refresh=False):
+    """Verify all claims, calling on_result(index, result) as each one finishes.
+
+    Duplicate claims are verified once and the verdict is reported for every copy;
+    claims whose search queries match up to word order and filler words share one
+    Tavily search, which is also reused from recent runs. All searches run
+    concurrently, and claims are verified in batches of VERIFY_BATCH_SIZE as their
+    evidence arrives, with the batches themselves running in parallel.
+    """
+    unique, index_map = dedupe_claims(claims)
+    copies = [[] for _ in unique]
+    for i, u in enumerate(index_map):
+        copies[u].append(i)
+
+    def report(u, result):
+        for i in copies[u]:
+            on_result(i, result)
+
+    tavily_sem = asyncio.Semaphore(TAVILY_CONCURRENCY)
+    gemini_sem = asyncio.Semaphore(GEMINI_CONCURRENCY)
+    search_tasks = {}
+
+    def search(claim_obj):
+        key = search_key(claim_obj["search_query"])
+        if key not in search_tasks:
+            search_tasks[key] = asyncio.ensure_future(
+                cached_search(claim_obj["search_query"], tavily_sem, force_refresh)
+            )
+        return search_tasks[key]
+
+    pending = []
+    for u, claim_obj in enumerate(unique):
+        cached = None if force_refresh else get_cached_verdict(claim_obj)
+        if cached:
+            report(u, cached)
+        else:
+            pending.append(u)
+
+    async def search_one(u):
+        try:
+            return u, await search(unique[u])
+        except Exception as e:
+            return u, e
+
+    async def run_batch(ready):
+        done = set()
+
+        def on_verdict(i, verdict):
+            u, context = ready[i]
+            done.add(u)
+            cache_verdict(unique[u], verdict, context)
+            report(u, verdict)
+
+        try:
+            cut_off = await verify_claims_batch(
+                [unique[u] for u, _ in ready], [context for _, context in ready], gemini_sem, on_verdict
+            )
+            leftover = {"status": "ERROR", "explanation": "No verdict returned for this claim"}
+        except Exception as e:
+            # Verdicts that streamed in before the failure are kept
+            cut_off, leftover = False, error_verdict(e)
+        unanswered = [(u, context) for u, context in ready if u not in done]
+        if cut_off and unanswered:
+            # The output token cap was hit part-way through the array: verify the claims
+            # still missing again in smaller batches, halving them like extraction windows
+            if len(unanswered) > 1:
+                mid = len(unanswered) // 2
+                await asyncio.gather(run_batch(unanswered[:mid]), run_batch(unanswered[mid:]))
+                return
+            if len(ready) > 1:
+                await run_batch(unanswered)
+                return
+            leftover = {"status": "ERROR", "explanation": "Output token cap reached before this claim's verdict"}
+        for u, _ in unanswered:
+            report(u, leftover)
+
+    # Stage 1 fires every search at once; stage 2 fills Gemini batches in the
+    # order searches finish, so one slow query never holds up a whole batch.
+    batch_tasks, ready = [], []
+    try:
+        for next_done in asyncio.as_completed([search_one(u) for u in pending]):
+            u, found = await next_done
+            if isinstance(found, Exception):
+                report(u, error_verdict(found))
+                continue
+            # Skip the Gemini hop when the search answer already confirms the claim
+            verdict = answer_verdict(unique[u], found)
+            if verdict:
+                cache_verdict(unique[u], verdict)
+                report(u, verdict)
+                continue
+            context = format_context(found)
+            verdict = None if force_refresh else disk_cache.get(evidence_key(unique[u], context))
+            if verdict:
+                cache_verdict(unique[u], verdict)
+                report(u, verdict)
+                continue
+            ready.append((u, context))
+            if len(ready) == VERIFY_BATCH_SIZE:
+                batch_tasks.append(asyncio.create_task(run_batch(ready)))
+                ready = []
+        if ready:
+            batch_tasks.append(asyncio.create_task(run_batch(ready)))
+        await asyncio.gather(*batch_tasks)
+    finally:
+        # A cancelled run (Stop or a rerun in the UI) must not leave searches or
+        # batches running on the shared loop
+        for task in [*search_tasks.values(), *batch_tasks]:
+            task.cancel()
 
 # ---------------- UI ----------------
+STATUS_ICONS = {"VERIFIED": "✅", "INACCURATE": "⚠️", "FALSE": "❌"}
+
 st.title("🔍 Fact-Checking Web App")
 st.markdown("**Upload a PDF to verify claims against live web data.**")
 
@@ -118,47 +621,133 @@ with st.sidebar:
     4. Review results  
     """)
     st.divider()
-    st.caption(f"Updated: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
+    force_refresh = st.checkbox("Force refresh", help="Ignore cached verdicts and re-verify every claim")
+    # Formatted once per session instead of on every rerun
+    if "session_ts" not in st.session_state:
+        st.session_state["session_ts"] = datetime.now().strftime("%Y-%m-%d %H:%M")
+    st.caption(f"Session started: {st.session_state['session_ts']}")
 
 uploaded_file = st.file_uploader("📄 Upload PDF", type=["pdf"])
 
 if uploaded_file:
     st.success(f"Uploaded: {uploaded_file.name}")
+    pdf_bytes = uploaded_file.getvalue()
+    # Identifies the document itself, so a different file with the same name never shows this report
+    pdf_hash = cache_key(pdf_bytes)
 
     if st.button("🚀 Start Fact-Checking", use_container_width=True):
-        with st.spinner("Reading PDF..."):
-            text = extract_text_from_pdf(uploaded_file)
-            st.info(f"Extracted {len(text)} characters")
-
-        with st.spinner("Extracting claims..."):
-            claims = extract_claims(text)
+        started_ns = time.monotonic_ns()
+        with st.status("Reading PDF...", expanded=True) as status:
+            # A re-upload of the same document skips both reading it and extracting claims
+            claims = get_cached_claims(pdf_hash, MODEL_NAME)
+            if claims:
+                st.write("Reusing claims already extracted from this document")
+            else:
+                text = extract_text_from_pdf(pdf_bytes, pdf_hash)
+                st.write(f"Extracted {len(text)} characters")
+                if len(text) >= MAX_DOCUMENT_CHARS:
+                    st.warning(f"Only the first {MAX_DOCUMENT_CHARS} characters of this document are checked.")
+
+                status.update(label="Extracting claims...")
+                try:
+                    claims = extract_claims(text, MODEL_NAME)
+                    cache_claims(pdf_hash, MODEL_NAME, claims)
+                except IncompleteExtraction as e:
+                    # Partial results are shown but not cached, so the next run retries every section
+                    st.warning(f"{e} (sections {', '.join(map(str, e.failed))}); their claims are missing.")
+                    claims = e.claims
+                except Exception as e:
+                    st.error(f"Claim extraction failed: {e}")
+                    claims = []
             if not claims:
-                st.error("No claims extracted.")
+                status.update(label="No claims extracted.", state="error")
                 st.stop()
-
-        st.success(f"Found {len(claims)} claims")
+            st.write(f"Found {len(claims)} claims")
+
+            status.update(label="Verifying claims...")
+            results = [None] * len(claims)
+            # A running count instead of re-scanning results on every verdict; kept in a
+            # dict so on_result updates it without relying on module-level globals
+            progress_state = {"done": 0}
+            placeholder = st.empty()
+            progress = st.progress(0)
+            # One line per claim, filled in as soon as its verdict arrives; plain text
+            # so figures like "$42,500" are not read as markdown math
+            lines = [st.empty() for _ in claims]
+            for line, claim_obj in zip(lines, claims):
+                line.text(f"⏳ {claim_obj['claim']}")
+
+            def on_result(i, result):
+                results[i] = result
+                progress_state["done"] += 1
+                done = progress_state["done"]
+                verdict = result.get("status", "ERROR")
+                lines[i].text(f"{STATUS_ICONS.get(verdict, '❗')} {verdict}: {claims[i]['claim']}")
+                placeholder.markdown(f"Verified {done}/{len(claims)}")
+                progress.progress(done / len(claims))
+
+            runner.run(lambda emit: verify_claims(claims, emit, force_refresh), on_result)
+            elapsed_ms = (time.monotonic_ns() - started_ns) // 1_000_000
+            status.update(label=f"Fact-check complete in {elapsed_ms / 1000:.1f}s", state="complete", expanded=False)
+
+        # Kept in session state so the report survives reruns from later widget interactions
+        st.session_state["results"] = {"pdf_hash": pdf_hash, "claims": claims, "results": results}
+
+    report = st.session_state.get("results")
+    if report and report["pdf_hash"] == pdf_hash:
         st.subheader("🔎 Verification Results")
 
-        verified = inaccurate = false = errors = 0
-        progress = st.progress(0)
-
-        for i, claim in enumerate(claims):
-            result = verify_claim(claim)
-            status = result.get("status", "ERROR")
-
-            if status == "VERIFIED":
-                verified += 1
-            elif status == "INACCURATE":
-                inaccurate += 1
-            elif status == "FALSE":
-                false += 1
-            else:
-                errors += 1
-
-            with st.expander(claim["claim"]):
-                st.write(result)
+        # Imported here rather than at the top: pandas is the slowest import in the app
+        # and is only needed once there is a report to show
+        import pandas as pd
+
+        # One table instead of an expander per claim keeps rendering cheap on long documents
+        df = pd.DataFrame([
+            {
+                "Status": result.get("status", "ERROR"),
+                "Claim": claim["claim"],
+                "Category": claim.get("category", ""),
+                "Correct": result.get("correct_info", ""),
+                "Sources": ", ".join(result.get("sources", [])[:3])
+            }
+            for claim, result in zip(report["claims"], report["results"])
+        ])
+        selection = st.dataframe(
+            df,
+            column_config={"Status": st.column_config.TextColumn(width="small")},
+            hide_index=True,
+            use_container_width=True,
+            on_select="rerun",
+            selection_mode="single-row"
+        )
+        for row in selection.selection.rows:
+            with st.container(border=True):
+                st.markdown(f"**{report['claims'][row]['claim']}**")
+                st.write(report["results"][row])
+
+        col_csv, col_json = st.columns(2)
+        col_csv.download_button(
+            "⬇️ Download CSV",
+            df.to_csv(index=False),
+            file_name="fact_check.csv",
+            mime="text/csv",
+            use_container_width=True
+        )
+        col_json.download_button(
+            "⬇️ Download JSON",
+            # Rebuilt on every rerun while the report is shown, so use the fast C encoder
+            orjson.dumps(
+                [{"claim": claim, "result": result} for claim, result in zip(report["claims"], report["results"])],
+                option=orjson.OPT_INDENT_2
+            ),
+            file_name="fact_check.json",
+            mime="application/json",
+            use_container_width=True
+        )
 
-            progress.progress((i + 1) / len(claims))
+        counts = Counter(result.get("status", "ERROR").upper() for result in report["results"])
+        verified, inaccurate, false = counts["VERIFIED"], counts["INACCURATE"], counts["FALSE"]
+        errors = len(report["results"]) - verified - inaccurate - false
 
         st.divider()
         st.subheader("📊 Summary")
@@ -0,0 +1,121 @@
+import re
+import unicodedata
+
+WHITESPACE = re.compile(r"\s+")
+
+# Python's \w leaves out combining marks, which Devanagari, Thai and many other
+# scripts write vowels with, so they are added back to keep those words whole
+COMBINING_MARKS = "".join(
+    re.escape(ch) for ch in map(chr, range(0x10000)) if unicodedata.category(ch).startswith("M")
+)
+
+# Claims are compared as sequences of these tokens, ignoring case and punctuation;
+# words are letters of any script, so "Société" or "特斯拉" are never dropped.
+# Search keys also ignore word order and the filler words below
+CLAIM_TOKEN = re.compile(rf"[$€£]?\d[\d,.]*%?|(?:[^\W\d_]|[{COMBINING_MARKS}])+")
+STOPWORDS = frozenset(
+    "a an the of in on at to for by with as is are was were be been being has have had "
+    "its it this that these those and or from about around approximately".split()
+)
+
+# Words that never change what a claim states; duplicates may differ only in these
+ARTICLES = frozenset("a an the".split())
+
+NUMBER = re.compile(r"[$€£]?\d[\d,.]*%?")
+
+# Tavily's answer settles a claim on its own only if it explicitly affirms it, states
+# exactly the claim's figures, repeats every content word of the claim and has none
+# of the cues that it disagrees or qualifies
+AFFIRMATION_CUES = re.compile(r"\b(yes|correct|accurate|true|confirm(?:s|ed)?|indeed)\b", re.IGNORECASE)
+CONTRADICTION_CUES = re.compile(
+    r"\b(not|no|no longer|never|incorrect|false|inaccurate|untrue|however|but|actually|contrary|instead|"
+    r"rather than|although|though|whereas|missed|missing|short of|below|above|less than|more than|only)\b",
+    re.IGNORECASE
+)
+
+def normalize_text(text):
+    return WHITESPACE.sub(" ", text.lower().strip())
+
+def normalize_figure(figure):
+    # "42,500" and "42500" compare equal; currency symbols and percent signs are kept,
+    # so "$5" never matches "€5"
+    return figure.replace(",", "").rstrip(".")
+
+def figures(text):
+    return {normalize_figure(n) for n in NUMBER.findall(text)}
+
+def claim_key(text):
+    """Claim text with case, punctuation and digit grouping normalized.
+
+    Word order, negations and currencies are kept, so "Apple acquired Beats" and
+    "Beats acquired Apple" stay distinct.
+    """
+    return " ".join(normalize_figure(t) for t in CLAIM_TOKEN.findall(text.lower()))
+
+def claim_fingerprint(text):
+    """Order-insensitive set of content words and figures, so reworded search queries match."""
+    tokens = {normalize_figure(t) for t in CLAIM_TOKEN.findall(text.lower())}
+    return " ".join(sorted(tokens - STOPWORDS))
+
+def query_key(query):
+    """Search query reduced to its fingerprint, so reworded queries compare equal.
+
+    A fingerprint with no words left would match every other query on the same
+    figures, so such queries are only matched on their full normalized text.
+    """
+    fingerprint = claim_fingerprint(query)
+    if all(NUMBER.fullmatch(t) for t in fingerprint.split()):
+        return normalize_text(query)
+    return fingerprint
+
+def claim_identity(claim_obj):
+    """What decides a claim's verdict: its category, its wording and its search query.
+
+    Claim text often names no entity ("Revenue grew 12%"); the query carries that
+    context, so the same sentence about two companies never shares a verdict.
+    """
+    return f"{claim_obj.get('category', '')}|{claim_key(claim_obj['claim'])}|{query_key(claim_obj['search_query'])}"
+
+def dedupe_claims(claims):
+    """Collapse claims that state the same thing in the same words.
+
+    Claims fold together only when their words and figures match in order, ignoring
+    case, punctuation and articles; any other difference, such as "increased" versus
+    "decreased" or an added "not", keeps them apart. As in claim_identity, the
+    category and search query must match too, since they carry the claim's subject.
+    Returns (unique, index_map) where claims[i] is represented by unique[index_map[i]].
+    """
+    unique, index_map, seen = [], [], {}
+    for claim_obj in claims:
+        key = (
+            claim_obj.get("category", ""),
+            query_key(claim_obj.get("search_query", "")),
+            tuple(t for t in claim_key(claim_obj["claim"]).split() if t not in ARTICLES)
+        )
+        if key not in seen:
+            seen[key] = len(unique)
+            unique.append(claim_obj)
+        index_map.append(seen[key])
+    return unique, index_map
+
+def answer_verdict(claim_obj, search):
+    """Verdict from Tavily's own answer when it plainly settles the claim, else None.
+
+    Anything short of an explicit, word-for-word confirmation is left to Gemini.
+    """
+    answer = search["answer"]
+    claim_figures = figures(claim_obj["claim"])
+    if not answer or not claim_figures or figures(answer) != claim_figures:
+        return None
+    if not AFFIRMATION_CUES.search(answer) or CONTRADICTION_CUES.search(answer):
+        return None
+    # "rose" in the claim must not be answered by "fell", nor "Apple" by "Samsung"
+    claim_words = set(claim_key(claim_obj["claim"]).split()) - STOPWORDS - claim_figures
+    if not claim_words <= set(claim_key(answer).split()):
+        return None
+    return {
+        "status": "VERIFIED",
+        "correct_info": answer,
+        "sources": [r["u"] for r in search["results"][:2] if r["u"]],
+        "explanation": "Tavily's answer confirms the claim with the same figures and wording"
+    }
@@ -0,0 +1,89 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+# Large PDFs are split into ranges of this many pages, extracted in parallel
+PAGES_PER_TASK = 10
+MAX_WORKERS = 8
+
+# PDFium is not thread-safe, even across different documents, so every call made
+# in this process is serialized; parallelism comes from worker processes instead.
+PDFIUM_LOCK = threading.Lock()
+
+def iter_page_texts(pdf, start, stop):
+    for i in range(start, stop):
+        page = pdf[i]
+        textpage = page.get_textpage()
+        try:
+            yield textpage.get_text_range().replace("\r\n", "\n")
+        finally:
+            # Also runs when a caller stops early, so page handles are never leaked
+            textpage.close()
+            page.close()
+
+def join_pages(texts, max_chars=None):
+    """Join page texts in order, stopping as soon as max_chars characters are collected."""
+    parts, total = [], 0
+    for text in texts:
+        parts.append(text)
+        total += len(text) + 1
+        if max_chars is not None and total >= max_chars:
+            break
+    return "\n".join(parts)[:max_chars]
+
+def extract_page_range(pdf_bytes, start, stop):
+    # Runs in a single-threaded worker process with its own copy of PDFium
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(pdf_bytes)
+    try:
+        return list(iter_page_texts(pdf, start, stop))
+    finally:
+        pdf.close()
+
+def make_executor(max_workers=MAX_WORKERS):
+    """Process pool for extract_text, meant to be created once and reused; None where fork is unavailable."""
+    # Streamlit executes app.py as __main__, so spawn/forkserver workers would
+    # re-run the whole script on start-up; only fork is safe to use here.
+    if "fork" not in multiprocessing.get_all_start_methods():
+        return None
+    workers = min(max_workers, os.cpu_count() or 1)
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork"))
+
+def extract_text(pdf_bytes, max_chars=None, executor=None):
+    """Extract the document's text, reading no further than the first max_chars characters.
+
+    With an executor, pages are read in worker processes, PAGES_PER_TASK at a time, and
+    the calling thread only waits; without one they are read in this process.
+    """
+    # PDFium is loaded on first use rather than at import, so the app starts without it
+    import pypdfium2 as pdfium
+
+    # The document is opened and closed under the lock, so no PDFium handle outlives it
+    # and is later finalized on some other thread
+    with PDFIUM_LOCK:
+        pdf = pdfium.PdfDocument(pdf_bytes)
+        try:
+            page_count = len(pdf)
+            if executor is None:
+                pages = iter_page_texts(pdf, 0, page_count)
+                try:
+                    return join_pages(pages, max_chars)
+                finally:
+                    pages.close()
+        finally:
+            pdf.close()
+
+        # Workers are forked on first use while the lock is held, so no thread is inside PDFium at that moment
+        futures = [
+            executor.submit(extract_page_range, pdf_bytes, start, min(start + PAGES_PER_TASK, page_count))
+            for start in range(0, page_count, PAGES_PER_TASK)
+        ]
+
+    try:
+        return join_pages((text for future in futures for text in future.result()), max_chars)
+    finally:
+        # Ranges past the character limit that have not started yet are dropped
+        for future in futures:
+            future.cancel()
@@ -0,0 +1,176 @@
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from types import SimpleNamespace
+
+from api_utils import RateLimiter, iter_streamed_array, open_stream, retry_after, split_text
+
+VERDICTS = [
+    {"id": 1, "status": "VERIFIED", "sources": ["https://example.com/a,b"], "explanation": "Listed as [1], then [2]."},
+    {"id": 2, "status": "FALSE", "sources": [], "explanation": "Quote: \"rose to $42,500]\" is wrong, {not} 45,200"},
+    {"id": 3, "status": "INACCURATE", "sources": ["https://example.com"], "explanation": "ends with ]"},
+]
+
+
+async def chunk_stream(texts):
+    for text in texts:
+        yield SimpleNamespace(text=text)
+
+
+def collect(stream):
+    async def run():
+        return [item async for item in iter_streamed_array(stream)]
+    return asyncio.run(run())
+
+
+def pieces(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def test_streamed_array_survives_any_chunk_boundary():
+    text = json.dumps(VERDICTS, indent=2)
+    for size in (1, 2, 3, 7, 64, len(text)):
+        assert collect(chunk_stream(pieces(text, size))) == VERDICTS
+
+
+def test_streamed_array_splits_inside_strings_with_brackets_and_commas():
+    text = json.dumps(VERDICTS)
+    cut = text.index("$42,500]") + len("$42,")
+    assert collect(chunk_stream([text[:cut], text[cut:]])) == VERDICTS
+
+
+def test_streamed_array_yields_each_element_before_the_stream_ends():
+    text = json.dumps(VERDICTS)
+    first_end = text.index("}, {") + 1
+    seen = []
+
+    async def stream():
+        yield SimpleNamespace(text=text[:first_end])
+        seen.append("second chunk read")
+        yield SimpleNamespace(text=text[first_end:])
+
+    async def run():
+        async for item in iter_streamed_array(stream()):
+            seen.append(item["id"])
+
+    asyncio.run(run())
+    assert seen == [1, "second chunk read", 2, 3]
+
+
+def test_streamed_array_drops_an_element_cut_off_mid_way():
+    text = json.dumps(VERDICTS)
+    assert collect(chunk_stream([text[:text.index("ends with")]])) == VERDICTS[:2]
+
+
+def test_streamed_array_ignores_empty_chunks():
+    assert collect(chunk_stream([None, "[", "", "]"])) == []
+
+
+def test_open_stream_replays_first_chunk_then_the_rest():
+    async def start(**kwargs):
+        assert kwargs == {"model": "m"}
+        return chunk_stream(["a", "b", "c"])
+
+    async def run():
+        stream = await open_stream(start, model="m")
+        return [chunk.text async for chunk in stream]
+
+    assert asyncio.run(run()) == ["a", "b", "c"]
+
+
+def test_open_stream_handles_an_empty_stream():
+    async def start():
+        return chunk_stream([])
+
+    async def run():
+        return [chunk async for chunk in await open_stream(start)]
+
+    assert asyncio.run(run()) == []
+
+
+def test_open_stream_raises_errors_from_the_first_read():
+    # The request is only sent on the first read, so its errors must surface from
+    # open_stream itself, where a retry wrapper can catch them
+    attempts = []
+
+    async def start():
+        attempts.append(1)
+        if len(attempts) < 3:
+            async def failing():
+                raise ConnectionError("503")
+                yield
+            return failing()
+        return chunk_stream(["ok"])
+
+    async def run():
+        for _ in range(3):
+            try:
+                stream = await open_stream(start)
+            except ConnectionError:
+                continue
+            return [chunk.text async for chunk in stream]
+
+    assert asyncio.run(run()) == ["ok"]
+    assert len(attempts) == 3
+
+
+def test_split_text_windows_overlap_and_cover_the_text():
+    text = "".join(chr(ord("a") + i % 26) for i in range(2500))
+    windows = split_text(text, 1000, 200)
+    assert all(len(w) <= 1000 for w in windows)
+    for i, (prev, cur) in enumerate(zip(windows, windows[1:]), start=1):
+        assert text[i * 800:i * 800 + 1000] == cur
+        assert prev[-200:] == cur[:200]
+    assert windows[-1] == text[-len(windows[-1]):]
+
+
+def test_split_text_short_text_is_one_window():
+    assert split_text("short", 1000, 200) == ["short"]
+    assert split_text("", 1000, 200) == [""]
+
+
+def error_with(headers):
+    return Exception() if headers is None else SimpleNamespace(response=SimpleNamespace(headers=headers))
+
+
+def test_retry_after_seconds_are_clamped():
+    assert retry_after(error_with({"retry-after": "7"}), 60.0) == 7.0
+    assert retry_after(error_with({"retry-after": "600"}), 60.0) == 60.0
+    assert retry_after(error_with({"retry-after": "-3"}), 60.0) == 0.0
+
+
+def test_retry_after_http_date():
+    when = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    assert 25 <= retry_after(error_with({"retry-after": when}), 60.0) <= 30
+
+
+def test_retry_after_missing_or_invalid():
+    assert retry_after(error_with(None), 60.0) is None
+    assert retry_after(error_with({}), 60.0) is None
+    assert retry_after(error_with({"retry-after": "soon"}), 60.0) is None
+
+
+def test_rate_limiter_waits_for_the_window():
+    limiter = RateLimiter(2, window=0.2)
+
+    async def run():
+        start = time.monotonic()
+        for _ in range(3):
+            await limiter.acquire()
+        return time.monotonic() - start
+
+    assert asyncio.run(run()) >= 0.18
+
+
+def test_rate_limiter_pause_holds_back_callers():
+    limiter = RateLimiter(10, window=60.0)
+    limiter.pause(0.2)
+
+    async def run():
+        start = time.monotonic()
+        await limiter.acquire()
+        return time.monotonic() - start
+
+    assert asyncio.run(run()) >= 0.18
@@ -0,0 +1,128 @@
+from claim_utils import answer_verdict, claim_identity, claim_key, dedupe_claims, figures, query_key
+
+
+def claims(*texts):
+    return [{"claim": text} for text in texts]
+
+
+def test_claim_key_ignores_case_punctuation_and_digit_grouping():
+    assert claim_key("Bitcoin traded at $42,500.") == claim_key("bitcoin traded at  $42500")
+
+
+def test_claim_key_keeps_word_order_and_currency():
+    assert claim_key("Apple acquired Beats for $3 billion") != claim_key("Beats acquired Apple for $3 billion")
+    assert claim_key("Revenue was $5 billion") != claim_key("Revenue was €5 billion")
+
+
+def test_claim_key_keeps_words_in_any_script():
+    assert claim_key("Société Générale") == "société générale"
+    assert claim_key("हिन्दी समाचार, 2024") == "हिन्दी समाचार 2024"
+    assert claim_key("特斯拉交付了 180 万辆汽车") == "特斯拉交付了 180 万辆汽车"
+    assert claim_key("Выручка выросла") != claim_key("Прибыль упала")
+
+
+def test_dedupe_keeps_same_text_with_different_queries_apart():
+    acme = {"claim": "Revenue grew 12% year over year", "category": "financial", "search_query": "Acme revenue growth 2024"}
+    globex = dict(acme, search_query="Globex revenue growth 2024")
+    reworded = dict(acme, search_query="2024 revenue growth of Acme")
+    unique, index_map = dedupe_claims([acme, globex, reworded])
+    assert unique == [acme, globex]
+    assert index_map == [0, 1, 0]
+
+
+def test_dedupe_keeps_different_non_latin_claims_apart():
+    _, index_map = dedupe_claims(claims("苹果公司收购了Beats", "特斯拉交付了汽车", "Выручка выросла", "Прибыль упала"))
+    assert index_map == [0, 1, 2, 3]
+
+
+def test_query_key_ignores_word_order_and_filler_words():
+    assert query_key("Acme revenue growth in 2024") == query_key("2024 revenue growth of Acme")
+
+
+def test_query_key_keeps_non_latin_queries_apart():
+    assert query_key("特斯拉 2024 交付量") != query_key("比亚迪 2024 营收")
+
+
+def test_query_key_never_matches_on_figures_alone():
+    assert query_key("the 2024") != query_key("of 2024")
+    assert query_key("in 2024") == "in 2024"
+
+
+def test_claim_identity_depends_on_search_query():
+    acme = {"claim": "Revenue grew 12% year over year", "category": "financial", "search_query": "Acme revenue growth 2024"}
+    globex = dict(acme, search_query="Globex revenue growth 2024")
+    reworded = dict(acme, search_query="2024 revenue growth of Acme")
+    assert claim_identity(acme) != claim_identity(globex)
+    assert claim_identity(acme) == claim_identity(reworded)
+
+
+def test_figures_keep_currency():
+    assert figures("It rose 3.5% to $42,500.") == {"3.5%", "$42500"}
+
+
+def test_dedupe_folds_copies_that_differ_in_case_punctuation_and_articles():
+    unique, index_map = dedupe_claims(claims(
+        "Bitcoin traded at $42,500",
+        "bitcoin traded at $42500.",
+        "The operating margin rose to 12%",
+        "Operating margin rose to 12%",
+    ))
+    assert [c["claim"] for c in unique] == ["Bitcoin traded at $42,500", "The operating margin rose to 12%"]
+    assert index_map == [0, 0, 1, 1]
+
+
+def test_dedupe_keeps_opposite_claims_apart():
+    base = ("In its annual report for fiscal year 2024, the company stated that its operating margin "
+            "{} by 4% compared with the previous fiscal year, driven by lower logistics costs")
+    unique, index_map = dedupe_claims(claims(
+        base.format("increased"),
+        base.format("decreased"),
+        base.format("did not increase"),
+    ))
+    assert len(unique) == 3
+    assert index_map == [0, 1, 2]
+
+
+def test_dedupe_keeps_different_figures_and_word_order_apart():
+    unique, _ = dedupe_claims(claims(
+        "Bitcoin traded at $42,500",
+        "Bitcoin traded at $45,200",
+        "Apple acquired Beats for $3 billion",
+        "Beats acquired Apple for $3 billion",
+    ))
+    assert len(unique) == 4
+
+
+def search(answer):
+    return {"answer": answer, "results": [{"t": "t", "u": "https://example.com", "s": "s"}]}
+
+
+def test_answer_verdict_confirms_explicit_matching_answer():
+    verdict = answer_verdict(
+        {"claim": "Bitcoin traded at $42,500 on January 5, 2026"},
+        search("Yes, Bitcoin traded at $42,500 on January 5, 2026."),
+    )
+    assert verdict["status"] == "VERIFIED"
+    assert verdict["sources"] == ["https://example.com"]
+
+
+def test_answer_verdict_rejects_opposite_verb():
+    claim = {"claim": "Bitcoin rose to $42,500 on January 5, 2026"}
+    assert answer_verdict(claim, search("Yes, Bitcoin fell to $42,500 on January 5, 2026.")) is None
+
+
+def test_answer_verdict_rejects_answer_with_other_figures():
+    claim = {"claim": "Tesla delivered 2 million vehicles in 2023"}
+    answer = "Confirmed: Tesla delivered 1.8 million vehicles in 2023, missing its 2 million target."
+    assert answer_verdict(claim, search(answer)) is None
+
+
+def test_answer_verdict_needs_affirmation_and_no_contradiction():
+    claim = {"claim": "Unemployment was 3.5% in 2025"}
+    assert answer_verdict(claim, search("Unemployment was 3.5% in 2025.")) is None
+    assert answer_verdict(claim, search("That is not correct: unemployment was 3.5% in 2025 only briefly.")) is None
+
+
+def test_answer_verdict_rejects_other_currency():
+    claim = {"claim": "Revenue was $5 billion in 2024"}
+    assert answer_verdict(claim, search("Yes, revenue was €5 billion in 2024.")) is None
@@ -0,0 +1,80 @@
+import pytest
+
+from pdf_utils import PAGES_PER_TASK, extract_text, join_pages, make_executor
+
+pytest.importorskip("pypdfium2")
+
+PAGE_COUNT = 35
+
+
+def make_pdf(page_texts):
+    """A minimal PDF with one line of Helvetica text per page."""
+    page_ids = [4 + 2 * i for i in range(len(page_texts))]
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % i for i in page_ids) + b"] /Count %d >>" % len(page_ids),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for page_id, text in zip(page_ids, page_texts):
+        stream = b"BT /F1 12 Tf 72 720 Td (" + text.encode() + b") Tj ET"
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (page_id + 1)
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    pdf, offsets = b"%PDF-1.4\n", []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return pdf
+
+
+@pytest.fixture(scope="module")
+def pdf_bytes():
+    return make_pdf([f"Page {i} text" for i in range(PAGE_COUNT)])
+
+
+@pytest.fixture(scope="module")
+def executor():
+    executor = make_executor(max_workers=4)
+    if executor is None:
+        pytest.skip("fork is not available")
+    yield executor
+    executor.shutdown()
+
+
+def test_join_pages_stops_reading_at_max_chars():
+    read = []
+
+    def pages():
+        for text in ["aaaa", "bbbb", "cccc", "dddd"]:
+            read.append(text)
+            yield text
+
+    assert join_pages(pages(), max_chars=7) == "aaaa\nbb"
+    assert read == ["aaaa", "bbbb"]
+
+
+def test_join_pages_without_limit_keeps_everything_in_order():
+    assert join_pages(["a", "b", "c"]) == "a\nb\nc"
+
+
+def test_extract_text_keeps_page_order(pdf_bytes):
+    assert PAGE_COUNT > 3 * PAGES_PER_TASK
+    lines = extract_text(pdf_bytes).split("\n")
+    assert [line.strip() for line in lines if line.strip()] == [f"Page {i} text" for i in range(PAGE_COUNT)]
+
+
+def test_extract_text_truncates_at_max_chars(pdf_bytes):
+    full = extract_text(pdf_bytes)
+    assert extract_text(pdf_bytes, max_chars=100) == full[:100]
+
+
+def test_pool_matches_in_process_extraction(pdf_bytes, executor):
+    assert extract_text(pdf_bytes, executor=executor) == extract_text(pdf_bytes)
+    assert extract_text(pdf_bytes, max_chars=500, executor=executor) == extract_text(pdf_bytes, max_chars=500)